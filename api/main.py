@@ -1,24 +1,82 @@
 # api/main.py
+import time
+_IMPORT_T0 = time.perf_counter()
+
 import os
 import json
-from typing import List, Optional
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Annotated, Dict, List, Optional
 
 import pandas as pd
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import FileResponse, JSONResponse
+from pydantic import BaseModel, ConfigDict, Field, create_model
 
-from src.data import load_timeseries
-from src.forecast import forecast_per_group
+from src.data import load_timeseries, load_history_tail
+from src.forecast import (forecast_per_group, forecast_scenarios, perturb_weather, preload_models,
+                          quantile_columns, check_member)
+from src.external_sources import HOURLY_VARS
 from src.peaks import peak_hours
-from src.map_anim import animated_map
-from src.config import REGISTRY_PATH
+from src.config import REGISTRY_PATH, LAGS
+# src.map_anim (matplotlib) and training deps are imported inside their endpoints.
+
+# --------------------------------------------------------------------------------------
+# Startup profile: warmup state + latency budgets (seconds, override via env)
+# --------------------------------------------------------------------------------------
+IMPORT_BUDGET_S = float(os.environ.get("IMPORT_BUDGET_S", 3.0))
+FIRST_REQUEST_BUDGET_S = float(os.environ.get("FIRST_REQUEST_BUDGET_S", 2.0))
+
+STARTUP = {
+    "import_s": None,
+    "warmup_s": None,
+    "first_request_s": None,
+    "ready": False,
+    "warmup_done": False,
+    "warmup_errors": {},
+}
+
+def warmup():
+    """Preload models, the history tail and the weather cache so the first request is cheap."""
+    t0 = time.perf_counter()
+    errors = {}
+    model_dir = os.environ.get("MODEL_DIR", MODEL_DIR)
+    try:
+        if preload_models(model_dir) == 0:
+            errors["models"] = f"no models found in {model_dir}"
+    except Exception as e:
+        errors["models"] = repr(e)
+    try:
+        load_history_tail(os.environ.get("DATA_PATH", DATA_PATH), max(LAGS))
+    except Exception as e:
+        errors["history"] = repr(e)
+    try:
+        from src.external_sources import openmeteo_forecast_bulk
+        reg_df = load_registry_df(os.environ.get("REGISTRY_PATH", REGISTRY))
+        openmeteo_forecast_bulk({r.region: (r.lat, r.lon) for r in reg_df.itertuples()}, days=7)
+    except Exception as e:
+        errors["weather"] = repr(e)
+    STARTUP["warmup_errors"] = errors
+    STARTUP["warmup_s"] = round(time.perf_counter() - t0, 3)
+    STARTUP["warmup_done"] = True
+    # Weather is refetched on demand, so only missing models/history make the instance unready.
+    STARTUP["ready"] = "models" not in errors and "history" not in errors
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the port binds immediately; /ready flips when done.
+    if os.environ.get("WARMUP", "1") == "0":
+        STARTUP["ready"] = STARTUP["warmup_done"] = True
+    else:
+        threading.Thread(target=warmup, name="warmup", daemon=True).start()
+    yield
 
 # --------------------------------------------------------------------------------------
 # App setup
 # --------------------------------------------------------------------------------------
-app = FastAPI(title="Renewables 7-day Forecast API (Weather-aware)")
+app = FastAPI(title="Renewables 7-day Forecast API (Weather-aware)", lifespan=lifespan)
 
 # Optional CORS (adjust origins as needed)
 app.add_middleware(
@@ -45,6 +103,18 @@ def load_registry_df(path: Optional[str] = None) -> pd.DataFrame:
     with open(reg_path, "r", encoding="utf-8") as f:
         return pd.DataFrame(json.load(f))
 
+def run_forecast(df: pd.DataFrame, reg_df: pd.DataFrame, model_dir: str) -> pd.DataFrame:
+    """forecast_per_group, recording the latency of the first non-empty forecast for /ready."""
+    t0 = time.perf_counter()
+    fc = forecast_per_group(df, reg_df, model_dir)
+    if STARTUP["first_request_s"] is None and not fc.empty:
+        STARTUP["first_request_s"] = round(time.perf_counter() - t0, 3)
+    return fc
+
+def load_history(path: Optional[str] = None) -> pd.DataFrame:
+    """History tail needed to seed forecast lags (cached until the CSV changes)."""
+    return load_history_tail(path or DATA_PATH, max(LAGS))
+
 # --------------------------------------------------------------------------------------
 # Pydantic request models for POST endpoints
 # --------------------------------------------------------------------------------------
@@ -55,6 +125,28 @@ class ForecastRequest(BaseModel):
     # If you later train more quantiles, you can accept these and route accordingly.
     quantiles: Optional[List[float]] = None  # e.g. [0.05, 0.95]
 
+# One hour of a scenario member: an optional timestamp plus any Open-Meteo hourly variables.
+WeatherRecord = create_model(
+    "WeatherRecord",
+    __config__=ConfigDict(extra="forbid"),
+    timestamp=(Optional[datetime], None),
+    **{v: (Optional[float], None) for v in HOURLY_VARS},
+)
+
+class ScenarioRequest(BaseModel):
+    region: Optional[str] = None
+    source: Optional[str] = None
+    horizon_hours: int = Field(default=168, ge=1, le=168)
+    # region -> K trajectories of hourly weather records, e.g. {"cloud_cover": 80, "wind_speed_100m": 7.5}.
+    # Records may carry a "timestamp"; otherwise they align to the forecast hours in order.
+    # Variables not given are taken from the Open-Meteo forecast.
+    # Naive timestamps are read as UTC.
+    members: Optional[Dict[str, List[List[WeatherRecord]]]] = None
+    # Each entry adds one member to every region: Open-Meteo forecast with columns scaled.
+    perturbations: Optional[List[Dict[str, float]]] = None
+    quantiles: List[Annotated[float, Field(ge=0, le=1)]] = Field(default=[0.05, 0.5, 0.95], min_length=1)
+    include_paths: bool = True
+
 class PeaksRequest(BaseModel):
     region: Optional[str] = None
     source: Optional[str] = None
@@ -70,14 +162,35 @@ class TrainRequest(BaseModel):
     registry_path: str = str(REGISTRY_PATH)
     model_dir: str = "models"
 
+# --------------------------------------------------------------------------------------
+# Liveness / readiness
+# --------------------------------------------------------------------------------------
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+@app.get("/ready")
+def ready():
+    """Warmup status plus the measured startup profile against its budgets."""
+    first = STARTUP["first_request_s"]
+    body = {
+        **STARTUP,
+        "budgets": {"import_s": IMPORT_BUDGET_S, "first_request_s": FIRST_REQUEST_BUDGET_S},
+        "within_budget": {
+            "import_s": STARTUP["import_s"] <= IMPORT_BUDGET_S,
+            "first_request_s": None if first is None else first <= FIRST_REQUEST_BUDGET_S,
+        },
+    }
+    return JSONResponse(body, status_code=200 if STARTUP["ready"] else 503)
+
 # --------------------------------------------------------------------------------------
 # GET endpoints (filter via query params)
 # --------------------------------------------------------------------------------------
 @app.get("/forecast")
 def forecast_get(region: Optional[str] = None, source: Optional[str] = None):
-    df = load_timeseries(DATA_PATH)
+    df = load_history()
     reg_df = load_registry_df()
-    fc = forecast_per_group(df, reg_df, MODEL_DIR)
+    fc = run_forecast(df, reg_df, MODEL_DIR)
     if region:
         fc = fc[fc["region"] == region]
     if source:
@@ -86,9 +199,9 @@ def forecast_get(region: Optional[str] = None, source: Optional[str] = None):
 
 @app.get("/peaks")
 def peaks_get(region: Optional[str] = None, source: Optional[str] = None):
-    df = load_timeseries(DATA_PATH)
+    df = load_history()
     reg_df = load_registry_df()
-    fc = forecast_per_group(df, reg_df, MODEL_DIR)
+    fc = run_forecast(df, reg_df, MODEL_DIR)
     if fc.empty:
         return []
     pk = peak_hours(fc)
@@ -100,11 +213,12 @@ def peaks_get(region: Optional[str] = None, source: Optional[str] = None):
 
 @app.get("/map")
 def map_get():
-    df = load_timeseries(DATA_PATH)
+    df = load_history()
     reg_df = load_registry_df()
-    fc = forecast_per_group(df, reg_df, MODEL_DIR)
+    fc = run_forecast(df, reg_df, MODEL_DIR)
     gif_path = os.path.join(OUT_DIR, "regional_animation.gif")
     coords = {r.region: [r.lat, r.lon] for r in reg_df.itertuples()}
+    from src.map_anim import animated_map
     animated_map(fc, coords, gif_path)
     return {"gif_path": gif_path}
 
@@ -118,11 +232,11 @@ def map_gif():
 # --------------------------------------------------------------------------------------
 @app.post("/forecast")
 def forecast_post(req: ForecastRequest):
-    df = load_timeseries(os.environ.get("DATA_PATH", DATA_PATH))
+    df = load_history(os.environ.get("DATA_PATH", DATA_PATH))
     reg_df = load_registry_df(os.environ.get("REGISTRY_PATH", REGISTRY))
     model_dir = os.environ.get("MODEL_DIR", MODEL_DIR)
 
-    fc = forecast_per_group(df, reg_df, model_dir)
+    fc = run_forecast(df, reg_df, model_dir)
     if fc.empty:
         return []
 
@@ -140,13 +254,56 @@ def forecast_post(req: ForecastRequest):
 
     return fc.to_dict(orient="records")
 
+@app.post("/forecast/scenarios")
+def forecast_scenarios_post(req: ScenarioRequest):
+    from src.external_sources import openmeteo_forecast_bulk
+
+    df = load_history(os.environ.get("DATA_PATH", DATA_PATH))
+    reg_df = load_registry_df(os.environ.get("REGISTRY_PATH", REGISTRY))
+    model_dir = os.environ.get("MODEL_DIR", MODEL_DIR)
+
+    if req.region:
+        df = df[df["region"] == req.region]
+        reg_df = reg_df[reg_df["region"] == req.region]
+    if req.source:
+        df = df[df["source"] == req.source]
+
+    # Invalid members, perturbations or quantiles raise ValueError in src.forecast -> 422
+    scenarios = {}
+    try:
+        quantile_columns(req.quantiles)
+        for region, trajectories in (req.members or {}).items():
+            for records in trajectories:
+                member = pd.DataFrame([r.model_dump(exclude_none=True) for r in records])
+                if "timestamp" in member.columns:
+                    member["timestamp"] = pd.to_datetime(member["timestamp"], utc=True)
+                check_member(member)
+                scenarios.setdefault(region, []).append(member)
+        perturbations = req.perturbations if req.perturbations is not None else ([] if req.members else [{}])
+        if perturbations:
+            weather = openmeteo_forecast_bulk({r.region: (r.lat, r.lon) for r in reg_df.itertuples()}, days=7)
+            for region, base in weather.items():
+                scenarios.setdefault(region, []).extend(perturb_weather(base, p) for p in perturbations)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    paths, bands = forecast_scenarios(df, reg_df, model_dir, scenarios,
+                                      quantiles=req.quantiles, horizon=req.horizon_hours)
+    if bands.empty:
+        return {"paths": [], "quantiles": []}
+
+    return {
+        "paths": paths.to_dict(orient="records") if req.include_paths else [],
+        "quantiles": bands.to_dict(orient="records"),
+    }
+
 @app.post("/peaks")
 def peaks_post(req: PeaksRequest):
-    df = load_timeseries(os.environ.get("DATA_PATH", DATA_PATH))
+    df = load_history(os.environ.get("DATA_PATH", DATA_PATH))
     reg_df = load_registry_df(os.environ.get("REGISTRY_PATH", REGISTRY))
     model_dir = os.environ.get("MODEL_DIR", MODEL_DIR)
 
-    fc = forecast_per_group(df, reg_df, model_dir)
+    fc = run_forecast(df, reg_df, model_dir)
     if fc.empty:
         return []
 
@@ -160,17 +317,18 @@ def peaks_post(req: PeaksRequest):
 
 @app.post("/map")
 def map_post(req: MapRequest):
-    df = load_timeseries(os.environ.get("DATA_PATH", DATA_PATH))
+    df = load_history(os.environ.get("DATA_PATH", DATA_PATH))
     reg_df = load_registry_df(os.environ.get("REGISTRY_PATH", REGISTRY))
     model_dir = os.environ.get("MODEL_DIR", MODEL_DIR)
 
-    fc = forecast_per_group(df, reg_df, model_dir)
+    fc = run_forecast(df, reg_df, model_dir)
     if req.regions:
         fc = fc[fc["region"].isin(req.regions)]
 
     os.makedirs(OUT_DIR, exist_ok=True)
     gif_path = os.path.join(OUT_DIR, req.gif_name or "regional_animation.gif")
     coords = {r.region: [r.lat, r.lon] for r in reg_df.itertuples()}
+    from src.map_anim import animated_map
     animated_map(fc, coords, gif_path)
     return {"gif_path": gif_path}
 
@@ -181,7 +339,8 @@ def train_post(req: TrainRequest):
     Expects files already present on disk (data/registry). For file uploads,
     add a multipart endpoint separately.
     """
-    from src.external_sources import openmeteo_history, pvgis_radiation, global_wind_atlas_stub
+    from src.external_sources import openmeteo_history
+    from src.static_features import enrich_static
     from src.forecast import train_per_group
 
     os.makedirs(req.model_dir, exist_ok=True)
@@ -191,17 +350,8 @@ def train_post(req: TrainRequest):
     with open(req.registry_path, "r", encoding="utf-8") as f:
         reg_df = pd.DataFrame(json.load(f))
 
-    # Enrich static (PVGIS/GWA)
-    if "pvgis_ghi_mean" not in reg_df.columns or reg_df["pvgis_ghi_mean"].isna().any():
-        for i, row in reg_df.iterrows():
-            try:
-                info = pvgis_radiation(row["lat"], row["lon"])
-                reg_df.loc[i, "pvgis_ghi_mean"] = info.get("pvgis_ghi_mean")
-            except Exception:
-                reg_df.loc[i, "pvgis_ghi_mean"] = None
-    if "gwa_mean_speed_100m" not in reg_df.columns or reg_df["gwa_mean_speed_100m"].isna().any():
-        for i, row in reg_df.iterrows():
-            reg_df.loc[i, "gwa_mean_speed_100m"] = global_wind_atlas_stub(row["lat"], row["lon"])["gwa_mean_speed_100m"]
+    # Enrich static (PVGIS/GWA) through the on-disk static cache
+    reg_df = enrich_static(reg_df)
 
     # Historical weather per region
     hist_weather = []
@@ -232,6 +382,8 @@ def train_post(req: TrainRequest):
 
     return {"status": "ok", "models_dir": req.model_dir, "groups_trained": n}
 
+STARTUP["import_s"] = round(time.perf_counter() - _IMPORT_T0, 3)
+
 # --------------------------------------------------------------------------------------
 # Optional: run with `python -m uvicorn api.main:app --reload --port 8080`
 # --------------------------------------------------------------------------------------
@@ -0,0 +1,45 @@
+# scripts/check_scenarios.py  (sanity check: a positional what-if member must move the forecast)
+import os, sys
+from pathlib import Path
+
+# ---- locate project root (folder that contains 'src' and 'scripts') ----
+THIS_FILE = Path(__file__).resolve()
+ROOT = THIS_FILE.parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import json, numpy as np, pandas as pd
+from src.data import load_history_tail
+from src.forecast import forecast_scenarios
+from src.config import REGISTRY_PATH, LAGS
+
+DATA_PATH = os.environ.get("DATA_PATH", "data/synthetic.csv")
+MODEL_DIR = os.environ.get("MODEL_DIR", "models")
+REGISTRY  = os.environ.get("REGISTRY_PATH", str(REGISTRY_PATH))
+REGION    = os.environ.get("REGION", "North")
+HOURS     = 24
+
+df = load_history_tail(DATA_PATH, max(LAGS))
+df = df[df["region"] == REGION]
+with open(REGISTRY, "r", encoding="utf-8") as f:
+    reg_df = pd.DataFrame(json.load(f))
+
+# member 0: the Open-Meteo forecast unchanged; member 1: first day overcast and calm,
+# given as records without timestamps (aligned to the forecast hours in order)
+overcast = pd.DataFrame([{"cloud_cover": 100.0, "shortwave_radiation": 0.0, "direct_radiation": 0.0,
+                          "diffuse_radiation": 0.0, "wind_speed_10m": 0.0, "wind_speed_100m": 0.0,
+                          "wind_speed_120m": 0.0, "wind_gusts_10m": 0.0}] * HOURS)
+paths, _ = forecast_scenarios(df, reg_df, MODEL_DIR, {REGION: [pd.DataFrame(), overcast]})
+if paths.empty:
+    raise SystemExit(f"No scenario forecast produced for {REGION}; are models trained?")
+
+bad = []
+for (region, source), g in paths.groupby(["region", "source"], sort=False):
+    base = g[g["member"] == 0]["mw_hat"].to_numpy()[:HOURS]
+    what_if = g[g["member"] == 1]["mw_hat"].to_numpy()[:HOURS]
+    diff = float(np.abs(base - what_if).max())
+    print(f"{region}/{source}: max |mw_hat(base) - mw_hat(overcast)| over {HOURS}h = {diff:.3f}")
+    if not diff > 0:
+        bad.append(f"{region}/{source}")
+
+raise SystemExit(f"positional member had no effect: {', '.join(bad)}" if bad else 0)
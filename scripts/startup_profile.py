@@ -0,0 +1,39 @@
+# scripts/startup_profile.py  (cold-start budget check; exits 1 when over budget)
+import os, sys, time
+from pathlib import Path
+
+# ---- locate project root (folder that contains 'src' and 'scripts') ----
+THIS_FILE = Path(__file__).resolve()
+ROOT = THIS_FILE.parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+# Run this in a fresh interpreter: the import measurement is only meaningful cold.
+# For a per-module breakdown use: python -X importtime -c "import api.main"
+t0 = time.perf_counter()
+import api.main as api
+import_s = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+api.warmup()
+warmup_s = time.perf_counter() - t0
+
+error = None
+t0 = time.perf_counter()
+try:
+    api.forecast_get()
+except Exception as e:
+    error = e
+first_request_s = time.perf_counter() - t0
+
+print(f"import:        {import_s:7.3f}s  (budget {api.IMPORT_BUDGET_S:.3f}s)")
+print(f"warmup:        {warmup_s:7.3f}s")
+if error is None:
+    print(f"first request: {first_request_s:7.3f}s  (budget {api.FIRST_REQUEST_BUDGET_S:.3f}s)")
+else:
+    print(f"first request: failed after {first_request_s:.3f}s: {error!r}")
+if api.STARTUP["warmup_errors"]:
+    print("warmup errors:", api.STARTUP["warmup_errors"])
+
+over = import_s > api.IMPORT_BUDGET_S or first_request_s > api.FIRST_REQUEST_BUDGET_S
+raise SystemExit(1 if over or error is not None else 0)
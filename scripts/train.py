@@ -9,7 +9,8 @@ if ROOT not in sys.path:
 
 # ---- project imports ----
 from src.data import load_timeseries
-from src.external_sources import openmeteo_history, pvgis_radiation, global_wind_atlas_stub
+from src.external_sources import openmeteo_history
+from src.static_features import enrich_static
 from src.forecast import train_per_group
 from src.config import REGISTRY_PATH
 
@@ -30,18 +31,8 @@ with open(REGISTRY, "r", encoding="utf-8") as f:
     registry = json.load(f)
 reg_df = pd.DataFrame(registry)
 
-# Enrich static features (PVGIS & GWA)
-if "pvgis_ghi_mean" not in reg_df.columns or reg_df["pvgis_ghi_mean"].isna().any():
-    for i, row in reg_df.iterrows():
-        try:
-            info = pvgis_radiation(row["lat"], row["lon"])
-            reg_df.loc[i, "pvgis_ghi_mean"] = info.get("pvgis_ghi_mean")
-        except Exception:
-            reg_df.loc[i, "pvgis_ghi_mean"] = None
-
-if "gwa_mean_speed_100m" not in reg_df.columns or reg_df["gwa_mean_speed_100m"].isna().any():
-    for i, row in reg_df.iterrows():
-        reg_df.loc[i, "gwa_mean_speed_100m"] = global_wind_atlas_stub(row["lat"], row["lon"])["gwa_mean_speed_100m"]
+# Enrich static features (PVGIS & GWA) through the on-disk static cache
+reg_df = enrich_static(reg_df)
 
 # Save enriched registry back
 with open(REGISTRY, "w", encoding="utf-8") as f:
@@ -12,11 +12,22 @@ DATA_PATH = Path("data/synthetic.csv")  # override via env in api/main.py
 MODEL_DIR = Path("models")
 OUT_DIR = Path("out")
 REGISTRY_PATH = Path("config/regions.json")  # region lat/lon + static features
+STATIC_CACHE_PATH = Path("data/static_cache.sqlite")  # PVGIS/GWA lookups keyed by rounded lat/lon
 
 # External sources
 OPEN_METEO_TIMEOUT = 30
 PVGIS_TIMEOUT = 30
 NREL_TIMEOUT = 30
 
+# PVGIS hourly series used for pvgis_ghi_mean (also part of the static cache key)
+PVGIS_RADDATABASE = "PVGIS-SARAH3"
+PVGIS_START_YEAR = 2020
+PVGIS_END_YEAR = 2024
+
+# Static feature cache: coordinate rounding (decimals), failed-lookup expiry, fetch threads
+STATIC_CACHE_DECIMALS = 2
+STATIC_CACHE_NEGATIVE_TTL = 24 * 3600
+STATIC_FETCH_WORKERS = 4
+
 # If NSRDB is used, set via env or .env for scripts:
 # NREL_API_KEY, NREL_EMAIL
@@ -1,3 +1,4 @@
+import os
 
 import pandas as pd
 
@@ -7,3 +8,24 @@ def load_timeseries(csv_path: str) -> pd.DataFrame:
     df = df.dropna(subset=["timestamp"])
     df = df.sort_values("timestamp").reset_index(drop=True)
     return df
+
+# Per-(path, mtime) cache of the history tail used to seed forecast lags.
+_TAIL_CACHE = {}
+
+def load_history_tail(csv_path: str, rows_per_group: int) -> pd.DataFrame:
+    """Last `rows_per_group` rows of each (region, source) series, cached until the CSV changes.
+    Forecasting only needs the most recent lags, so callers skip re-parsing the full history.
+    """
+    key = (os.path.abspath(csv_path), os.path.getmtime(csv_path), rows_per_group)
+    tail = _TAIL_CACHE.get(key)
+    if tail is None:
+        df = load_timeseries(csv_path)
+        tail = df.groupby(["region", "source"], sort=False).tail(rows_per_group)
+        # keep the groups in first-appearance order of the full frame, so response order matches it
+        order = {k: i for i, k in enumerate(df[["region", "source"]].drop_duplicates().itertuples(index=False, name=None))}
+        rank = [order[k] for k in zip(tail["region"], tail["source"])]
+        tail = (tail.assign(_group=rank).sort_values(["_group", "timestamp"], kind="stable")
+                    .drop(columns="_group").reset_index(drop=True))
+        _TAIL_CACHE.clear()
+        _TAIL_CACHE[key] = tail
+    return tail.copy()
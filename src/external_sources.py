@@ -1,21 +1,90 @@
 
-import os, requests, pandas as pd
+import os, re, time, threading, requests, pandas as pd
+from src.config import PVGIS_RADDATABASE, PVGIS_START_YEAR, PVGIS_END_YEAR
+
+# Open-Meteo hourly variables requested for forecasts and history (model weather features)
+HOURLY_VARS = [
+    "temperature_2m","relative_humidity_2m","cloud_cover",
+    "wind_speed_10m","wind_speed_100m","wind_speed_120m",
+    "wind_gusts_10m","shortwave_radiation","direct_radiation",
+    "diffuse_radiation","surface_pressure","precipitation"
+]
+
+# In-process cache of Open-Meteo forecasts keyed by (lat, lon, days, timezone).
+# The provider refreshes hourly, so a short TTL avoids one HTTP call per request.
+_FORECAST_CACHE = {}
+_FORECAST_CACHE_LOCK = threading.Lock()
 
 def openmeteo_forecast(lat: float, lon: float, days: int = 7, timezone: str = "UTC"):
+    """Hourly weather forecast, served from the in-process cache when fresh.
+    Set OPEN_METEO_CACHE_TTL=0 to always hit the API.
+    """
+    ttl = float(os.getenv("OPEN_METEO_CACHE_TTL", 900))
+    key = (round(float(lat), 4), round(float(lon), 4), int(days), timezone)
+    now = time.monotonic()
+    with _FORECAST_CACHE_LOCK:
+        hit = _FORECAST_CACHE.get(key)
+    if hit is not None and now - hit[0] < ttl:
+        return hit[1].copy()
+    df = _openmeteo_forecast_fetch([lat], [lon], days=days, timezone=timezone)[0]
+    if ttl > 0:
+        with _FORECAST_CACHE_LOCK:
+            _FORECAST_CACHE[key] = (now, df)
+    return df.copy()
+
+def _snap(v: float, grid_deg: float) -> float:
+    return round(round(float(v) / grid_deg) * grid_deg, 4)
+
+def openmeteo_forecast_bulk(coords: dict, days: int = 7, timezone: str = "UTC",
+                            grid_deg: float = None, batch_size: int = None) -> dict:
+    """Hourly weather forecasts for many sites with few HTTP calls.
+
+    `coords` maps region -> (lat, lon). Coordinates are snapped to the provider grid
+    (OPEN_METEO_GRID_DEG, default 0.1 deg), identical cells are fetched once, and uncached
+    cells are requested as comma-separated lists in batches of OPEN_METEO_BATCH_SIZE
+    (default 50). Returns region -> DataFrame; cells share the openmeteo_forecast cache.
+    """
+    grid = float(grid_deg or os.getenv("OPEN_METEO_GRID_DEG", 0.1))
+    batch = int(batch_size or os.getenv("OPEN_METEO_BATCH_SIZE", 50))
+    ttl = float(os.getenv("OPEN_METEO_CACHE_TTL", 900))
+    cell_of = {region: (_snap(lat, grid), _snap(lon, grid)) for region, (lat, lon) in coords.items()}
+
+    frames, missing = {}, []
+    now = time.monotonic()
+    for cell in dict.fromkeys(cell_of.values()):
+        with _FORECAST_CACHE_LOCK:
+            hit = _FORECAST_CACHE.get(cell + (int(days), timezone))
+        if hit is not None and now - hit[0] < ttl:
+            frames[cell] = hit[1]
+        else:
+            missing.append(cell)
+
+    for i in range(0, len(missing), batch):
+        chunk = missing[i:i + batch]
+        dfs = _openmeteo_forecast_fetch([c[0] for c in chunk], [c[1] for c in chunk], days=days, timezone=timezone)
+        for cell, df in zip(chunk, dfs):
+            frames[cell] = df
+            if ttl > 0:
+                with _FORECAST_CACHE_LOCK:
+                    _FORECAST_CACHE[cell + (int(days), timezone)] = (now, df)
+
+    return {region: frames[cell].copy() for region, cell in cell_of.items()}
+
+def _openmeteo_forecast_fetch(lats: list, lons: list, days: int = 7, timezone: str = "UTC"):
+    """One Open-Meteo call for all given locations; returns a DataFrame per location, in order."""
     url = "https://api.open-meteo.com/v1/forecast"
-    hourly_vars = [
-        "temperature_2m","relative_humidity_2m","cloud_cover",
-        "wind_speed_10m","wind_speed_100m","wind_speed_120m",
-        "wind_gusts_10m","shortwave_radiation","direct_radiation",
-        "diffuse_radiation","surface_pressure","precipitation"
-    ]
     r = requests.get(url, params={
-        "latitude": lat, "longitude": lon, "timezone": timezone,
-        "hourly": ",".join(hourly_vars),
+        "latitude": ",".join(str(v) for v in lats), "longitude": ",".join(str(v) for v in lons),
+        "timezone": timezone,
+        "hourly": ",".join(HOURLY_VARS),
         "forecast_days": days
     }, timeout=int(os.getenv("OPEN_METEO_TIMEOUT", 30)))
     r.raise_for_status()
     j = r.json()
+    # a single location comes back as an object, several as a list
+    return [_hourly_frame(x) for x in (j if isinstance(j, list) else [j])]
+
+def _hourly_frame(j: dict) -> pd.DataFrame:
     hrs = pd.to_datetime(j["hourly"]["time"], utc=True)
     df = pd.DataFrame({"timestamp": hrs})
     for k, v in j["hourly"].items():
@@ -25,15 +94,9 @@ def openmeteo_forecast(lat: float, lon: float, days: int = 7, timezone: str = "U
 
 def openmeteo_history(lat: float, lon: float, start_date: str, end_date: str, timezone: str = "UTC"):
     url = "https://archive-api.open-meteo.com/v1/archive"
-    hourly_vars = [
-        "temperature_2m","relative_humidity_2m","cloud_cover",
-        "wind_speed_10m","wind_speed_100m","wind_speed_120m",
-        "wind_gusts_10m","shortwave_radiation","direct_radiation",
-        "diffuse_radiation","surface_pressure","precipitation"
-    ]
     r = requests.get(url, params={
         "latitude": lat, "longitude": lon, "timezone": timezone,
-        "hourly": ",".join(hourly_vars),
+        "hourly": ",".join(HOURLY_VARS),
         "start_date": start_date, "end_date": end_date
     }, timeout=int(os.getenv("OPEN_METEO_TIMEOUT", 30)))
     r.raise_for_status()
@@ -45,27 +108,54 @@ def openmeteo_history(lat: float, lon: float, start_date: str, end_date: str, ti
         df[k] = v
     return df
 
-def pvgis_radiation(lat: float, lon: float):
+def pvgis_radiation(lat: float, lon: float, raddatabase: str = PVGIS_RADDATABASE,
+                    startyear: int = PVGIS_START_YEAR, endyear: int = PVGIS_END_YEAR):
     """Fetch PVGIS radiation summary (annual GHI etc.).
     Returns minimal dict; you can expand fields per your needs.
+    The multi-year hourly series is streamed as CSV and reduced to a running mean,
+    so memory stays flat regardless of the period requested.
     """
     url = "https://re.jrc.ec.europa.eu/api/v5_2/seriescalc"
     # Using defaults for simplicity; PVGIS supports rich parameters.
     params = {
-        "lat": lat, "lon": lon, "raddatabase": "PVGIS-SARAH3",
-        "startyear": 2020, "endyear": 2024, "outputformat": "json"
+        "lat": lat, "lon": lon, "raddatabase": raddatabase,
+        "startyear": startyear, "endyear": endyear, "outputformat": "csv"
     }
-    r = requests.get(url, params=params, timeout=int(os.getenv("PVGIS_TIMEOUT", 30)))
-    r.raise_for_status()
-    j = r.json()
-    # Extract quick aggregates from hourly series if available
-    ghi = None
-    if "outputs" in j and "hourly" in j["outputs"]:
-        df = pd.DataFrame(j["outputs"]["hourly"])
-        if "G(i)" in df.columns:
-            ghi = float(df["G(i)"].mean())
+    with requests.get(url, params=params, stream=True, timeout=int(os.getenv("PVGIS_TIMEOUT", 30))) as r:
+        r.raise_for_status()
+        ghi = _pvgis_column_mean(r.iter_lines(chunk_size=64 * 1024, decode_unicode=True), "G(i)")
     return {"pvgis_ghi_mean": ghi}
 
+_PVGIS_TIME = re.compile(r"^\d{8}:\d{4}$")
+
+def _pvgis_column_mean(lines, column: str):
+    """Mean of one column of a PVGIS CSV body (metadata header, data table, legend footer).
+    Blank lines are skipped (iter_lines yields one when a CRLF straddles a chunk); the
+    table ends at the first row that does not start with a YYYYMMDD:HHMM timestamp.
+    """
+    idx, total, n = None, 0.0, 0
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode("utf-8", "replace")
+        line = line.strip()
+        if not line:
+            continue
+        if idx is None:
+            if line.startswith("time,"):
+                header = line.split(",")
+                if column not in header:
+                    return None
+                idx = header.index(column)
+            continue
+        parts = line.split(",")
+        if not _PVGIS_TIME.match(parts[0]):
+            break  # legend footer
+        try:
+            total += float(parts[idx]); n += 1
+        except (ValueError, IndexError):
+            continue
+    return total / n if n else None
+
 def nsrdb_data_query(lat: float, lon: float, api_key: str, email: str):
     url = "https://developer.nrel.gov/api/solar/nsrdb_data_query.json"
     r = requests.get(url, params={
@@ -1,10 +1,33 @@
 # top of src/forecast.py
-import os, json, numpy as np, pandas as pd
+import os, json, glob, threading, numpy as np, pandas as pd
 from joblib import dump, load
-from src.models import GBMPointModel, QuantileGBM
 from src.config import FORECAST_HOURS, QUANTILES, LAGS
 from src.features import add_calendar_features, add_lags, encode_cats, merge_weather, attach_static
-from src.external_sources import openmeteo_forecast
+from src.external_sources import openmeteo_forecast_bulk, HOURLY_VARS
+
+# Unpickled models keyed by path; entries are invalidated when the file's mtime changes
+# (e.g. after /train rewrites the model directory).
+_MODEL_CACHE = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+def _load_model(path: str):
+    mtime = os.path.getmtime(path)
+    with _MODEL_CACHE_LOCK:
+        hit = _MODEL_CACHE.get(path)
+    if hit is not None and hit[0] == mtime:
+        return hit[1]
+    model = load(path)
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE[path] = (mtime, model)
+    return model
+
+def preload_models(model_dir: str) -> int:
+    """Unpickle every model in `model_dir` into the cache. Returns the count loaded."""
+    n = 0
+    for path in sorted(glob.glob(os.path.join(model_dir, "model_*.joblib"))):
+        _load_model(path)
+        n += 1
+    return n
 
 def _feat_cols(df_cols):
     base = ["hour","dow","dom","month","is_weekend","region_code","source_code","site_id_code"]
@@ -13,6 +36,9 @@ def _feat_cols(df_cols):
     return base + lags + weather
 
 def train_per_group(df: pd.DataFrame, registry_df: pd.DataFrame, out_dir: str):
+    # sklearn is imported here rather than at module level: it is about half of the API's
+    # import time, and serving only needs it once warmup unpickles the models.
+    from src.models import GBMPointModel, QuantileGBM
     os.makedirs(out_dir, exist_ok=True)
     df = attach_static(df, registry_df)
     df = add_calendar_features(df)
@@ -44,39 +70,51 @@ def train_per_group(df: pd.DataFrame, registry_df: pd.DataFrame, out_dir: str):
         meta.append({"region": region, "source": source, "features": feats})
     pd.DataFrame(meta).to_csv(f"{out_dir}/groups_trained.csv", index=False)
 
+def _future_index(g: pd.DataFrame, periods: int = FORECAST_HOURS) -> pd.DataFrame:
+    last_ts = g["timestamp"].max()
+    return pd.DataFrame({"timestamp": pd.date_range(last_ts + pd.Timedelta(hours=1), periods=periods, freq="h", tz="UTC")})
+
+def _future_frame(future: pd.DataFrame, region: str, source: str, registry_df: pd.DataFrame, wfc: pd.DataFrame) -> pd.DataFrame:
+    """Feature frame for the forecast hours; lag columns are left NaN for the recursive loop."""
+    wfc = wfc[wfc["timestamp"].isin(future["timestamp"])].reset_index(drop=True)
+    fut = future.copy()
+    fut["region"] = region
+    fut["source"] = source
+    fut["site_id"] = f"{region}-{source}"
+    fut = attach_static(fut, registry_df)
+    fut = merge_weather(fut, wfc)
+    fut = add_calendar_features(fut)
+    for L in LAGS:
+        fut[f"lag_{L}"] = np.nan
+    return encode_cats(fut)
+
+def _weather_for(df_hist: pd.DataFrame, regmap: dict, model_dir: str) -> dict:
+    """Bulk-fetch the weather forecast for every region that has at least one point model."""
+    coords = {}
+    for region, source in df_hist[["region","source"]].drop_duplicates().itertuples(index=False):
+        if region in regmap and os.path.exists(f"{model_dir}/model_point_{region}_{source}.joblib"):
+            coords[region] = (regmap[region]["lat"], regmap[region]["lon"])
+    return openmeteo_forecast_bulk(coords, days=7) if coords else {}
+
 def forecast_per_group(df_hist: pd.DataFrame, registry_df: pd.DataFrame, model_dir: str) -> pd.DataFrame:
     rows = []
     groups = df_hist.groupby(["region","source"], sort=False)
     regmap = registry_df.set_index("region").to_dict(orient="index")
+    weather = _weather_for(df_hist, regmap, model_dir)
     for (region, source), g in groups:
         try:
-            m_point = load(f"{model_dir}/model_point_{region}_{source}.joblib")
+            m_point = _load_model(f"{model_dir}/model_point_{region}_{source}.joblib")
         except:
             continue
 
-        last_ts = g["timestamp"].max()
-        future = pd.DataFrame({"timestamp": pd.date_range(last_ts + pd.Timedelta(hours=1), periods=FORECAST_HOURS, freq="h", tz="UTC")})
-
-        lat, lon = regmap[region]["lat"], regmap[region]["lon"]
-        wfc = openmeteo_forecast(lat, lon, days=7)
-        wfc = wfc[wfc["timestamp"].isin(future["timestamp"])].reset_index(drop=True)
+        future = _future_index(g)
 
-        fut = future.copy()
-        fut["region"] = region
-        fut["source"] = source
-        fut["site_id"] = f"{region}-{source}"
-        fut = attach_static(fut, registry_df)
-        fut = merge_weather(fut, wfc)
-        fut = add_calendar_features(fut)
+        fut = _future_frame(future, region, source, registry_df, weather[region])
 
         # lags from history + rolling with own mean predictions (simple)
         from collections import deque
         hist = g.sort_values("timestamp")
         lag_buf = deque(hist.set_index("timestamp")["mw"].iloc[-max(LAGS):].values.tolist(), maxlen=max(LAGS))
-        for L in LAGS:
-            fut[f"lag_{L}"] = np.nan
-        # We'll fill lags after we get point predictions iteratively.
-        fut = encode_cats(fut)
 
         feats = m_point.feats or [c for c in fut.columns if c not in ["timestamp","region","source","site_id","mw"]]
 
@@ -94,8 +132,8 @@ def forecast_per_group(df_hist: pd.DataFrame, registry_df: pd.DataFrame, model_d
 
         # quantiles
         try:
-            qlo = load(f"{model_dir}/model_q{int(QUANTILES[0]*100)}_{region}_{source}.joblib")
-            qhi = load(f"{model_dir}/model_q{int(QUANTILES[1]*100)}_{region}_{source}.joblib")
+            qlo = _load_model(f"{model_dir}/model_q{int(QUANTILES[0]*100)}_{region}_{source}.joblib")
+            qhi = _load_model(f"{model_dir}/model_q{int(QUANTILES[1]*100)}_{region}_{source}.joblib")
             Xf = fut[feats].fillna(method="ffill").fillna(method="bfill").values
             lo = qlo.predict(Xf); hi = qhi.predict(Xf)
         except:
@@ -107,3 +145,133 @@ def forecast_per_group(df_hist: pd.DataFrame, registry_df: pd.DataFrame, model_d
             "mw_hat": mean, "mw_lo": lo, "mw_hi": hi
         }))
     return pd.concat(rows, ignore_index=True) if rows else pd.DataFrame()
+
+def quantile_columns(quantiles) -> list:
+    """Band column names for the quantiles, e.g. 0.05 -> mw_q5, 0.025 -> mw_q2.5.
+    Raises ValueError unless they are a non-empty list of distinct values in [0, 1].
+    """
+    cols = [f"mw_q{q*100:g}" for q in quantiles]
+    if not cols or any(not 0 <= q <= 1 for q in quantiles) or len(set(cols)) != len(cols):
+        raise ValueError(f"quantiles must be a non-empty list of distinct values in [0, 1], got {list(quantiles)}")
+    return cols
+
+def _check_weather_vars(names):
+    unknown = sorted(set(names) - set(HOURLY_VARS) - {"timestamp"})
+    if unknown:
+        raise ValueError(f"unknown weather variables {unknown}; expected any of {HOURLY_VARS}")
+
+def check_member(member: pd.DataFrame):
+    """Raise ValueError for a scenario member that cannot be aligned: unknown variables,
+    some records with a timestamp and some without, or repeated timestamps.
+    """
+    _check_weather_vars(member.columns)
+    if "timestamp" in member.columns:
+        if member["timestamp"].isna().any():
+            raise ValueError("member mixes records with and without timestamps")
+        if member["timestamp"].duplicated().any():
+            raise ValueError("member has duplicate timestamps")
+
+def perturb_weather(wfc: pd.DataFrame, scales: dict) -> pd.DataFrame:
+    """Copy of a weather frame with columns scaled, e.g. {"cloud_cover": 1.2, "wind_speed_100m": 0.9}.
+    cloud_cover / relative_humidity_2m stay clipped to [0, 100].
+    """
+    _check_weather_vars(scales)
+    out = wfc.copy()
+    for col, k in scales.items():
+        if col in out.columns:
+            out[col] = out[col] * k
+            if col in ("cloud_cover", "relative_humidity_2m"):
+                out[col] = out[col].clip(0, 100)
+    return out
+
+def _align_member(member: pd.DataFrame, base: pd.DataFrame, future: pd.DataFrame) -> pd.DataFrame:
+    """Overlay one scenario member on the base weather forecast.
+    Members without a `timestamp` column are aligned positionally to the forecast hours.
+    """
+    check_member(member)
+    member = member.copy()
+    if "timestamp" not in member.columns:
+        member = member.iloc[:len(future)].reset_index(drop=True)
+        member.insert(0, "timestamp", future["timestamp"].iloc[:len(member)].reset_index(drop=True))
+    base = base[base["timestamp"].isin(future["timestamp"])].set_index("timestamp")
+    over = member.set_index("timestamp")
+    out = base.reindex(base.index.union(over.index))
+    for col in over.columns:
+        vals = over[col].dropna()  # hours a member leaves out keep the base forecast
+        out.loc[vals.index, col] = vals
+    return out.rename_axis("timestamp").reset_index()
+
+def forecast_scenarios(df_hist: pd.DataFrame, registry_df: pd.DataFrame, model_dir: str,
+                       scenarios: dict, quantiles=(0.05, 0.5, 0.95), horizon: int = FORECAST_HOURS):
+    """Forecast every (region, source) under K weather scenarios in one recursive pass.
+
+    `scenarios` maps region -> list of K weather frames; each overrides the matching
+    columns of the Open-Meteo forecast for that region (see `perturb_weather`).
+    The K member feature frames are stacked into a (K x horizon x features) tensor and
+    each recursive step is a single batched predict across members; the loop runs
+    only `horizon` steps.
+
+    Returns (paths, bands): per-member `mw_hat`/`mw_lo`/`mw_hi` rows with a `member`
+    column, and per-hour empirical quantiles of `mw_hat` across members (`mw_q5`, ...).
+    """
+    cols = quantile_columns(quantiles)
+
+    paths, bands = [], []
+    groups = df_hist.groupby(["region","source"], sort=False)
+    regmap = registry_df.set_index("region").to_dict(orient="index")
+    weather = _weather_for(df_hist[df_hist["region"].isin(list(scenarios))], regmap, model_dir)
+    for (region, source), g in groups:
+        members = scenarios.get(region)
+        if not members:
+            continue
+        try:
+            m_point = _load_model(f"{model_dir}/model_point_{region}_{source}.joblib")
+        except:
+            continue
+
+        future = _future_index(g, horizon)
+        base = weather[region]
+        futs = [_future_frame(future, region, source, registry_df, _align_member(m, base, future)) for m in members]
+        feats = m_point.feats or [c for c in futs[0].columns if c not in ["timestamp","region","source","site_id","mw"]]
+
+        X = np.stack([f[feats].to_numpy(dtype=float) for f in futs])   # (K, H, F)
+        K, H, _ = X.shape
+        lag_idx = {L: feats.index(f"lag_{L}") for L in LAGS if f"lag_{L}" in feats}
+
+        # lag buffer: shared history followed by each member's own predictions
+        hist = g.sort_values("timestamp")["mw"].iloc[-max(LAGS):].to_numpy(dtype=float)
+        n_hist = len(hist)
+        buf = np.empty((K, n_hist + H))
+        buf[:, :n_hist] = hist
+        for i in range(H):
+            for L, j in lag_idx.items():
+                pos = n_hist + i - L
+                X[:, i, j] = buf[:, pos] if pos >= 0 else np.nan
+            buf[:, n_hist + i] = m_point.forecast(X[:, i, :])
+        mean = buf[:, n_hist:]                                            # (K, H)
+
+        try:
+            qlo = _load_model(f"{model_dir}/model_q{int(QUANTILES[0]*100)}_{region}_{source}.joblib")
+            qhi = _load_model(f"{model_dir}/model_q{int(QUANTILES[1]*100)}_{region}_{source}.joblib")
+            Xf = np.concatenate([pd.DataFrame(X[k]).ffill().bfill().to_numpy() for k in range(K)])
+            lo = qlo.predict(Xf).reshape(K, H); hi = qhi.predict(Xf).reshape(K, H)
+        except:
+            lo = mean*0.85; hi = mean*1.15
+
+        ts = futs[0]["timestamp"]
+        paths.append(pd.DataFrame({
+            "timestamp": np.tile(ts.to_numpy(), K),
+            "region": region, "source": source,
+            "member": np.repeat(np.arange(K), H),
+            "mw_hat": mean.ravel(), "mw_lo": lo.ravel(), "mw_hi": hi.ravel()
+        }))
+        band = pd.DataFrame({"timestamp": ts, "region": region, "source": source})
+        for q, col in zip(quantiles, cols):
+            band[col] = np.nanquantile(mean, q, axis=0)
+        bands.append(band)
+
+    if not paths:
+        return pd.DataFrame(), pd.DataFrame()
+    paths = pd.concat(paths, ignore_index=True)
+    paths["timestamp"] = pd.to_datetime(paths["timestamp"], utc=True)
+    return paths, pd.concat(bands, ignore_index=True)
@@ -0,0 +1,96 @@
+import os, json, time, sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from src.config import (STATIC_CACHE_PATH, STATIC_CACHE_DECIMALS, STATIC_CACHE_NEGATIVE_TTL, STATIC_FETCH_WORKERS,
+                        PVGIS_RADDATABASE, PVGIS_START_YEAR, PVGIS_END_YEAR)
+from src.external_sources import pvgis_radiation, global_wind_atlas_stub
+
+# PVGIS series parameters; they are part of the cache key so changing them refetches.
+PVGIS_PARAMS = {"raddatabase": PVGIS_RADDATABASE, "startyear": PVGIS_START_YEAR, "endyear": PVGIS_END_YEAR}
+
+def _open(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    con = sqlite3.connect(path)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS static_features ("
+        "key TEXT PRIMARY KEY, value TEXT, ok INTEGER NOT NULL, fetched_at REAL NOT NULL)"
+    )
+    return con
+
+def _key(kind: str, lat: float, lon: float, params: dict, decimals: int) -> str:
+    p = ",".join(f"{k}={params[k]}" for k in sorted(params))
+    return f"{kind}:{round(float(lat), decimals):.{decimals}f}:{round(float(lon), decimals):.{decimals}f}:{p}"
+
+def cached_lookup(kind: str, fetch, coords: list, params: dict = None, cache_path: str = None) -> list:
+    """Resolve `fetch(lat, lon, **params)` for each (lat, lon) through the on-disk cache.
+
+    Coordinates are rounded to STATIC_CACHE_DECIMALS; only distinct uncached keys are
+    fetched, in parallel (STATIC_FETCH_WORKERS threads). A fetch that raises or returns
+    None is stored as a negative entry and not retried for STATIC_CACHE_NEGATIVE_TTL
+    seconds. Returns one value (or None) per input coordinate.
+    """
+    params = params or {}
+    cache_path = cache_path or os.getenv("STATIC_CACHE_PATH", str(STATIC_CACHE_PATH))
+    decimals = int(os.getenv("STATIC_CACHE_DECIMALS", STATIC_CACHE_DECIMALS))
+    neg_ttl = float(os.getenv("STATIC_CACHE_NEGATIVE_TTL", STATIC_CACHE_NEGATIVE_TTL))
+    workers = int(os.getenv("STATIC_FETCH_WORKERS", STATIC_FETCH_WORKERS))
+
+    keys = [_key(kind, lat, lon, params, decimals) for lat, lon in coords]
+    con = _open(cache_path)
+    try:
+        found, todo = {}, {}
+        now = time.time()
+        for key, (lat, lon) in zip(keys, coords):
+            if key in found or key in todo:
+                continue
+            row = con.execute("SELECT value, ok, fetched_at FROM static_features WHERE key = ?", (key,)).fetchone()
+            if row is not None and (row[1] or now - row[2] < neg_ttl):
+                found[key] = json.loads(row[0]) if row[1] else None
+            else:
+                todo[key] = (lat, lon)
+
+        def _fetch(latlon):
+            try:
+                return fetch(latlon[0], latlon[1], **params)
+            except Exception:
+                return None
+
+        if todo:
+            with ThreadPoolExecutor(max_workers=max(1, min(workers, len(todo)))) as ex:
+                results = list(ex.map(_fetch, todo.values()))
+            now = time.time()
+            for key, value in zip(todo, results):
+                found[key] = value
+                con.execute(
+                    "INSERT OR REPLACE INTO static_features (key, value, ok, fetched_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), int(value is not None), now),
+                )
+            con.commit()
+    finally:
+        con.close()
+    return [found[k] for k in keys]
+
+def _pvgis_ghi_mean(lat, lon, **params):
+    return pvgis_radiation(lat, lon, **params)["pvgis_ghi_mean"]
+
+def enrich_static(reg_df: pd.DataFrame, cache_path: str = None) -> pd.DataFrame:
+    """Fill missing `pvgis_ghi_mean` (via the static cache) and `gwa_mean_speed_100m` registry values.
+    The GWA stub is a local formula, so it is called directly rather than cached.
+    """
+    reg_df = reg_df.copy()
+    for col in ("pvgis_ghi_mean", "gwa_mean_speed_100m"):
+        if col not in reg_df.columns:
+            reg_df[col] = None
+
+    missing = reg_df["pvgis_ghi_mean"].isna()
+    if missing.any():
+        coords = list(zip(reg_df.loc[missing, "lat"], reg_df.loc[missing, "lon"]))
+        reg_df.loc[missing, "pvgis_ghi_mean"] = cached_lookup("pvgis", _pvgis_ghi_mean, coords, PVGIS_PARAMS, cache_path)
+
+    missing = reg_df["gwa_mean_speed_100m"].isna()
+    if missing.any():
+        reg_df.loc[missing, "gwa_mean_speed_100m"] = [
+            global_wind_atlas_stub(lat, lon)["gwa_mean_speed_100m"]
+            for lat, lon in zip(reg_df.loc[missing, "lat"], reg_df.loc[missing, "lon"])
+        ]
+    return reg_df